@@ -12,7 +12,7 @@ from joblib import Parallel, delayed
 from tqdm import tqdm
 
 from . import utils
-from .dataset_utils import chose_score_type, filter
+from .dataset_utils import _score_duration, chose_score_type, filter
 from .idiot import THISDIR
 
 # this only for detecting package directory but breaks readthedocs
@@ -70,6 +70,7 @@ class Dataset(object):
         # self.decompress_path = self.metadataset['decompress_path']
         self.paths = []
         self._chunks = {}
+        self._gts_cache = (None, None)
 
         # let's include all the songs and datasets
         for d in self.datasets:
@@ -219,6 +220,29 @@ class Dataset(object):
             gts.append(gt)
         return gts
 
+    def _get_gts_cached(self, idx):
+        """
+        Like `get_gts`, but the ground-truth of the last requested item is
+        kept in memory, so that utilities reading the same item multiple
+        times (e.g. `dataset_utils.get_pedaling_mat`) load it only once.
+
+        The returned list is shared with the cache: do not modify it.
+        """
+        paths = tuple(self.get_gts_paths(idx))
+        cached_paths, gts = self._gts_cache
+        if cached_paths != paths:
+            gts = self.get_gts(idx)
+            self._gts_cache = (paths, gts)
+        return gts
+
+    def clear_gts_cache(self):
+        """
+        Drop the ground-truth kept in memory by the utilities that read it
+        (e.g. `dataset_utils.get_score_mat`). This is done automatically by
+        `filter`.
+        """
+        self._gts_cache = (None, None)
+
     def get_source(self, idx):
         """
         Returns the sources at the specified index
@@ -363,17 +387,7 @@ class Dataset(object):
         Returns the duration of the most aligned score available for a specific
         item
         """
-        gts = self.get_gts(idx)
-        score_type = chose_score_type(
-            ['precise_alignment', 'broad_alignment', 'misaligned', 'score'],
-            gts)
-
-        gts_m = 0
-        for gt in gts:
-            gt_m = max(gt[score_type]['offsets'])
-            if gt_m > gts_m:
-                gts_m = gt_m
-        return gts_m
+        return _score_duration(self._get_gts_cached(idx))
 
     def get_audio_data(self, idx):
         """
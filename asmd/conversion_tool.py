@@ -5,7 +5,6 @@ import os
 import random
 import sys
 import tarfile
-from copy import deepcopy
 from difflib import SequenceMatcher
 from os.path import join as joinpath
 from typing import Callable, List, Optional
@@ -15,9 +14,14 @@ from pretty_midi.constants import INSTRUMENT_MAP
 
 from .asmd import load_definitions
 from .convert_from_file import *
-from .convert_from_file import _sort_alignment, _sort_pedal
+from .convert_from_file import _copy_gt, _sort_alignment, _sort_pedal
 from .idiot import THISDIR
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # this is only for detecting the package path
 
 #: if True, run conversion in parallel processes
@@ -179,22 +183,30 @@ def merge_dicts(idx, *args):
     if len(args) == 1:
         return args[0][idx]
 
-    obj1_copy = deepcopy(args[0][idx])
+    out = _copy_gt(args[0][idx])
 
     for arg in args[1:]:
         if arg is not None:
-            arg = arg[idx]
-            for key in obj1_copy.keys():
-                d1_element = obj1_copy[key]
-                if type(d1_element) is dict:
-                    obj1_copy[key] = merge_dicts(0, [d1_element], [arg[key]])
-                elif type(d1_element) is int:
-                    obj1_copy[key] = min(d1_element, arg[key])
-                else:
-                    obj1_copy[key] = d1_element + arg[key]
-        # del arg
+            _merge_into(out, arg[idx])
+
+    return out
 
-    return obj1_copy
+
+def _merge_into(d1, d2):
+    """
+    Add the values of the dictionary `d2` to the corresponding values of `d1`
+    (in-place): lists are extended, dicts are merged recursively, for ints the
+    minimum is kept and other values are summed
+    """
+    for key, d1_element in d1.items():
+        if type(d1_element) is dict:
+            _merge_into(d1_element, d2[key])
+        elif type(d1_element) is int:
+            d1[key] = min(d1_element, d2[key])
+        elif type(d1_element) is list:
+            d1_element.extend(d2[key])
+        else:
+            d1[key] = d1_element + d2[key]
 
 
 def fix_offsets(onsets, offsets, pitches):
@@ -306,8 +318,7 @@ def conversion(arg):
             out['extra'] = extra.tolist()
 
         print("   saving " + final_path)
-        # pretty printing stolen from official docs
-        json.dump(out, gzip.open(final_path, 'wt'), sort_keys=True, indent=4)
+        _dump_gt(out, final_path)
 
         # starting debugger if something is wrong
         if check(out) > 0:
@@ -324,6 +335,26 @@ def conversion(arg):
     return to_be_included_in_the_archive
 
 
+def _dump_gt(out, path):
+    """
+    Write the ground-truth dictionary `out` to the gzipped JSON file `path`.
+
+    If `orjson` is installed, it is used for serialization, otherwise the
+    standard `json` module is used. In both cases, keys are sorted and the
+    output is compact (no indentation nor spaces), so that the written files
+    are the same.
+    """
+    if orjson is not None:
+        with gzip.open(path, 'wb') as f:
+            f.write(
+                orjson.dumps(out,
+                             option=orjson.OPT_SORT_KEYS
+                             | orjson.OPT_SERIALIZE_NUMPY))
+    else:
+        with gzip.open(path, 'wt') as f:
+            json.dump(out, f, sort_keys=True, separators=(',', ':'))
+
+
 def generate_missing_extra(L, min_perc=0.10, max_perc=0.50):
     tot = rng.integers(min_perc * L, max_perc * L)
     me_proportion = rng.random() / 2 + 0.25
@@ -360,6 +391,7 @@ def create_gt(data_fn,
     json_file = json.load(open(data_fn, 'r'))
 
     to_be_included_in_the_archive = []
+    arg = []
     datasets = load_definitions(joinpath(THISDIR, 'definitions'))
     for dataset in datasets:
         if blacklist:
@@ -377,19 +409,23 @@ def create_gt(data_fn,
             print(dataset["name"] + " not installed, skipping it")
             continue
 
-        print("\n------------------------\n")
-        print("Starting processing " + dataset['name'])
-        arg = [(i, song, json_file, dataset, alignment_stats)
-               for i, song in enumerate(dataset['songs'])]
-        if not PARALLEL:
-            for i in range(len(dataset['songs'])):
-                to_be_included_in_the_archive += conversion(arg[i])
-        else:
-            CPU = os.cpu_count() - 1  # type: ignore
-            p = mp.Pool(CPU)
-            result = p.map_async(conversion, arg,
-                                 len(dataset['songs']) // CPU + 1)
-            to_be_included_in_the_archive += sum(result.get(), [])
+        print("Adding " + dataset['name'] + " to the processing queue")
+        arg += [(i, song, json_file, dataset, alignment_stats)
+                for i, song in enumerate(dataset['songs'])]
+
+    print("\n------------------------\n")
+    print("Starting processing")
+    if not PARALLEL:
+        for a in arg:
+            to_be_included_in_the_archive += conversion(a)
+    else:
+        # a single pool for all the datasets, so that workers are kept busy
+        # across dataset boundaries; chunks are small enough to balance songs
+        # of different lengths
+        CPU = max(1, os.cpu_count() - 1)  # type: ignore
+        with mp.Pool(CPU) as p:
+            for paths in p.imap(conversion, arg, len(arg) // (CPU * 4) + 1):
+                to_be_included_in_the_archive += paths
 
     def _remove_basedir(x):
         x.name = x.name.replace(json_file['install_dir'][1:] + '/', '')
@@ -398,7 +434,10 @@ def create_gt(data_fn,
     # creating the archive
     if gztar:
         print("\n\nCreating the final archive")
-        with tarfile.open('ground_truth.tar.gz', mode='w:gz') as tf:
+        # ground-truth files are already gzipped, so compressing them again
+        # at a high level only costs time
+        with tarfile.open('ground_truth.tar.gz', mode='w:gz',
+                          compresslevel=1) as tf:
             for fname in to_be_included_in_the_archive:
                 # adding file with relative path
                 tf.add(fname, filter=_remove_basedir)
@@ -1,7 +1,6 @@
 import csv
 import os
 import re
-from copy import deepcopy
 from functools import wraps
 
 import numpy as np
@@ -166,6 +165,34 @@ Note: ``pitches``, ``velocities``, ``sustain``, ``sostenuto``, ``soft``, and
 """
 
 
+def _copy_gt(d):
+    """
+    Return a copy of the ground-truth dictionary `d` where all the nested
+    dicts and lists are new objects; the items of the lists are shared.
+
+    This is much faster than ``deepcopy(d)`` and it is enough for
+    ground-truths, since lists are only extended or replaced, never modified
+    item by item.
+    """
+    out = {}
+    for key, value in d.items():
+        if type(value) is dict:
+            out[key] = _copy_gt(value)
+        elif type(value) is list:
+            out[key] = list(value)
+        else:
+            out[key] = value
+    return out
+
+
+def _empty_gt():
+    """
+    Return a new, empty ground-truth dictionary with the same structure as
+    `prototype_gt`
+    """
+    return _copy_gt(prototype_gt)
+
+
 def change_ext(input_fn, new_ext, no_dot=False, remove_player=False):
     """
     Return the input path `input_fn` with `new_ext` as extension and the part
@@ -192,8 +219,7 @@ def _sort_lists(*lists):
     Sort multiple lists in-place with reference to the first one
     """
 
-    idx = list(range(len(lists[0])))
-    idx.sort(key=lists[0].__getitem__)
+    idx = np.argsort(lists[0], kind='stable').tolist()
     for i in range(len(lists)):
         if len(lists[i]) > 0:
             lists[i][:] = map(lists[i].__getitem__, idx)
@@ -253,11 +279,11 @@ def from_midi(midi_fn,
     out = list()
 
     if merge:
-        data = deepcopy(prototype_gt)
+        data = _empty_gt()
 
     for track in pm.instruments:
         if not merge:
-            data = deepcopy(prototype_gt)
+            data = _empty_gt()
         for cc in track.control_changes:
             if cc.number == 64:
                 cc_name = 'sustain'
@@ -314,7 +340,7 @@ def from_phenicx_txt(txt_fn):
     with open(txt_fn) as f:
         lines = f.readlines()
 
-    out = deepcopy(prototype_gt)
+    out = _empty_gt()
     for line in lines:
         fields = re.split(',|\n', line)
         out["broad_alignment"]["notes"].append(fields[2])
@@ -341,7 +367,7 @@ def from_bach10_mat(mat_fn, sources=range(4)):
 
     mat = scipy.io.loadmat(mat_fn)['GTNotes']
     for i in range(len(mat)):
-        out = deepcopy(prototype_gt)
+        out = _empty_gt()
         source = mat[i, 0]
         for j in range(len(source)):
             note = source[j, 0]
@@ -370,7 +396,7 @@ def from_bach10_f0(nmat_fn, sources=range(4)):
 
     f0s = scipy.io.loadmat(nmat_fn)['GTF0s']
     for source in sources:
-        out = deepcopy(prototype_gt)
+        out = _empty_gt()
         out["f0"] = f0s[source].tolist()
         out_list.append(out)
 
@@ -392,7 +418,7 @@ def from_musicnet_csv(csv_fn, sr=44100.0):
     N.B. `score` times are provided with BPM 60 for all the scores
     """
     data = csv.reader(open(csv_fn), delimiter=',')
-    out = deepcopy(prototype_gt)
+    out = _empty_gt()
 
     # skipping first line
     next(data)
@@ -427,7 +453,7 @@ def from_sonic_visualizer(gt_fn, alignment='precise_alignment'):
 
     min_midi_freq = utils.midi_pitch_to_f0(0)
     data = csv.reader(open(gt_fn), delimiter=',')
-    out = deepcopy(prototype_gt)
+    out = _empty_gt()
     for row in data:
         p = float(row[1])
         if p < min_midi_freq:
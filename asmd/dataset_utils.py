@@ -1,3 +1,4 @@
+from copy import copy as shallowcopy
 from copy import deepcopy
 
 import numpy as np
@@ -45,7 +46,7 @@ def chose_score_type(score_type, gts):
     Parameters
     ---
 
-    score_type : list of str
+    score_type : list of str or str
         The key to retrieve the list of notes from the ground_truths. If
         multiple keys are provided, only one is retrieved by using the
         following criteria: if there is `precise_alignment` in the list of
@@ -53,10 +54,15 @@ def chose_score_type(score_type, gts):
         `broad_alignment` in the list of keys and in the ground truth, use
         that; otherwise if `misaligned` in the list of keys and in the ground
         truth, use use `score`.
+        If a str is provided, it is returned as it is and `gts` is not
+        inspected.
 
     gts : list of dict
         The list of ground truths from which you want to chose a score_type
     """
+    if isinstance(score_type, str):
+        return score_type
+
     if len(score_type) > 1:
         if 'precise_alignment' in score_type and len(
                 gts[0]['precise_alignment']['pitches']) > 0:
@@ -75,6 +81,22 @@ def chose_score_type(score_type, gts):
     return score_type
 
 
+def _score_duration(gts):
+    """
+    Returns the duration of the most aligned score available in the list of
+    ground truths `gts`
+    """
+    score_type = chose_score_type(
+        ['precise_alignment', 'broad_alignment', 'misaligned', 'score'], gts)
+
+    gts_m = 0
+    for gt in gts:
+        gt_m = max(gt[score_type]['offsets'])
+        if gt_m > gts_m:
+            gts_m = gt_m
+    return gts_m
+
+
 def filter(dataset,
            instruments=[],
            ensemble=None,
@@ -84,7 +106,7 @@ def filter(dataset,
            composer='',
            datasets=[],
            groups=[],
-           ground_truth=[],
+           ground_truth={},
            copy=False):
     """
     Filter the paths of the songs which accomplish the filter described
@@ -153,7 +175,8 @@ def filter(dataset,
         should use the `group` attribute to only select those songs.
     copy : bool
         If True, a new Dataset object is returned, and the calling one is
-        leaved untouched
+        leaved untouched; the content of songs (e.g. lists of paths and
+        instruments) is shared between the two objects
 
     Returns
     -------
@@ -161,65 +184,65 @@ def filter(dataset,
     If ``copy`` is True, return a new Dataset object.
     """
     if copy:
-        ret = deepcopy(dataset)
+        # only `paths`, `_chunks` and the `included` flags are changed here,
+        # so there is no need to copy songs' content
+        ret = shallowcopy(dataset)
+        ret._chunks = {}
+        ret.datasets = [{
+            **d, 'songs': [{**s} for s in d['songs']]
+        } for d in dataset.datasets]
     else:
         ret = dataset
 
     # let's remove everything and put only the wanted ones
     ret.paths = []
+    ret.clear_gts_cache()
+
+    # build the lookup structures once, outside of the loops
+    datasets = frozenset(d.lower() for d in datasets)
+    groups = frozenset(groups)
+    instruments = list(instruments)
+
+    def _song_ok(song, groups_gt):
+        # cheapest checks first, stop at the first failing one
+        if not song['included']:
+            return False
+        if composer and composer not in song['composer']:
+            return False
+        if instruments and instruments != song['instruments']:
+            return False
+        if groups and not groups.issubset(song['groups']):
+            return False
+        # checking groups taken for group-level filtering
+        if ground_truth and groups_gt.isdisjoint(song['groups']):
+            return False
+        return True
 
-    datasets = [d.lower() for d in datasets]
     end = 0
     for mydataset in ret.datasets:
-        FLAG = True
-        if not mydataset['included']:
-            FLAG = False
-        if len(datasets) > 0:
-            if mydataset['name'].lower() in datasets:
-                FLAG = True
-            else:
-                FLAG = False
+        if datasets:
+            FLAG = mydataset['name'].lower() in datasets
+        else:
+            FLAG = mydataset['included']
 
         # checking dataset-level filters
         if ensemble is not None:
             if ensemble != mydataset['ensemble']:
                 FLAG = False
 
-        # adding groups if ground_truth is checked
-        groups_gt = set()
-        for gt, val in ground_truth:
-            for group, group_gt in mydataset['ground_truth']:
-                if group_gt[gt] == val:
+        if FLAG:
+            # adding groups if ground_truth is checked
+            groups_gt = set()
+            for group, group_gt in mydataset['ground_truth'].items():
+                for gt, val in ground_truth.items():
+                    if group_gt[gt] != val:
+                        break
+                else:
                     groups_gt.add(group)
 
-        if FLAG:
             ret._chunks[mydataset['name']] = [end, end]
             for song in mydataset['songs']:
-                FLAG = True
-                if not song['included']:
-                    FLAG = False
-
-                # checking song levels filters
-                if instruments:
-                    if instruments != song['instruments']:
-                        FLAG = False
-
-                if composer:
-                    if composer not in song['composer']:
-                        FLAG = False
-
-                if groups:
-                    for group in groups:
-                        if group not in song['groups']:
-                            FLAG = False
-                            break
-
-                # checking groups taken for group-level filtering
-                if groups_gt:
-                    if len(groups_gt.intersection(song['groups'])) == 0:
-                        FLAG = False
-
-                if FLAG:
+                if _song_ok(song, groups_gt):
                     gts = song['ground_truth']
                     source = []
                     mix = []
@@ -291,9 +314,10 @@ def get_score_mat(dataset, idx, score_type=['misaligned'], return_notes=''):
     ---------
     idx : int
         The index of the song to retrieve.
-    score_type : list of str
+    score_type : list of str or str
         The key to retrieve the list of notes from the ground_truths. see
-        `chose_score_type` for explanation
+        `chose_score_type` for explanation; passing a str skips the
+        resolution
     return_notes : str
         ``'missing'``, ``'extra'`` or ``'both'``; the notes that will be
         returned together with the score; see
@@ -315,59 +339,32 @@ def get_score_mat(dataset, idx, score_type=['misaligned'], return_notes=''):
         ``return_notes``); only if ``return_notes == 'both'`` 
     """
 
-    gts = dataset.get_gts(idx)
+    gts = dataset._get_gts_cached(idx)
     score_type = chose_score_type(score_type, gts)
 
     # print("    Loading ground truth " + score_type)
+    fields = ['pitches', 'onsets', 'offsets', 'velocities']
     mat = []
     for i, gt in enumerate(gts):
 
-        # initilize each column
-        pitches = np.array(gt[score_type]['pitches'])
-
-        ons = np.array(gt[score_type]['onsets'])
-        if not len(ons):
-            ons = np.full_like(pitches, -255)
-
-        missing = len(pitches) - len(ons)
-        if missing < 0:
-            # add -255 to pitches
-            pitches = np.append(pitches, [-255] * -missing)
-        elif missing > 0:
-            # add -255 to ons
-            ons = np.append(ons, [-255] * missing)
-
-        offs = np.append(gt[score_type]['offsets'], [-255] * missing)
-        if not len(offs):
-            offs = np.full_like(ons, -255)
-
-        vel = np.append(gt[score_type]['velocities'], [-255] * missing)
-        if not len(vel):
-            vel = np.full_like(ons, -255)
-        missing = len(pitches) - len(vel)
-        if missing < 0:
-            # add -255 to pitches, ons and offs
-            pitches = np.append(pitches, [-255] * -missing)
-            ons = np.append(ons, [-255] * -missing)
-            offs = np.append(offs, [-255] * -missing)
-        elif missing > 0:
-            # add -255 to vel
-            vel = np.append(vel, [-255] * missing)
-
-        num = np.full_like(ons, i)
-        instr = np.full_like(ons, gt['instrument'])
-        gt_mat = np.array([pitches, ons, offs, vel, instr, num])
+        st = gt[score_type]
+        # allocate all the columns at once; missing values are -255
+        n = max(len(st[field]) for field in fields)
+        gt_mat = np.full((6, n), -255.0)
+        for row, field in enumerate(fields):
+            values = np.asarray(st[field], dtype=float)
+            gt_mat[row, :values.size] = values
+        gt_mat[4].fill(gt['instrument'])
+        gt_mat[5].fill(i)
         mat.append(gt_mat)
 
-    if len(mat) > 1:
-        # mat now contains one list per each ground-truth, concatenating
-        mat = np.concatenate(mat, axis=1)
-    else:
-        mat = np.array(mat[0])
-    # transposing: one row per note
-    mat = mat.T
-    # ordering by onset, pitch and offset (in this order)
-    ind = np.lexsort([mat[:, 2], mat[:, 0], mat[:, 1]])
+    # mat now contains one array per each ground-truth, concatenating
+    mat = np.concatenate(mat, axis=1)
+    # ordering by onset, pitch and offset (in this order); the keys are
+    # contiguous rows before transposing
+    ind = np.lexsort((mat[2], mat[0], mat[1]))
+    # transposing and sorting in one gather: one row per note
+    mat = mat.T[ind]
 
     if return_notes:
         if return_notes == 'both':
@@ -377,11 +374,11 @@ def get_score_mat(dataset, idx, score_type=['misaligned'], return_notes=''):
         # computing missing/extra notes
         returned_notes = []
         for q in query:
-            missing_extra = dataset.get_missing_extra_notes(idx, q)
-            missing_extra = np.concatenate(missing_extra)
+            missing_extra = np.concatenate(
+                [np.asarray(gt[q], dtype=bool) for gt in gts])
             returned_notes.append(missing_extra[ind])
-        return tuple([mat[ind]] + returned_notes)
-    return mat[ind]
+        return tuple([mat] + returned_notes)
+    return mat
 
 
 def intersect(*datasets, **kwargs):
@@ -520,36 +517,30 @@ def get_pedaling_mat(dataset, idx, frame_based=False, winlen=0.046, hop=0.01):
 
         The output is sorted by time.
     """
+    gts = dataset._get_gts_cached(idx)
+    if frame_based:
+        # compute the number of frames
+        dur = _score_duration(gts)
+        n_frames = int(utils.nframes(dur, hop, winlen)) + 1
+
     pedaling = []
-    for gt in dataset.get_gts(idx):
+    for gt in gts:
         # take all cc...
         cc_track_pedaling = []
-        for pedal in ['sustain', 'sostenuto', 'soft']:
-            L = len(gt[pedal]['values'])
-            if pedal == 'sustain':
-                cc_track_pedaling += list(
-                    zip(gt[pedal]['times'], gt[pedal]['values'], [-1] * L,
-                        [-1] * L))
-            elif pedal == 'sostenuto':
-                cc_track_pedaling += list(
-                    zip(gt[pedal]['times'], [-1] * L, gt[pedal]['values'],
-                        [-1] * L))
-            elif pedal == 'soft':
-                cc_track_pedaling += list(
-                    zip(gt[pedal]['times'], [-1] * L, [-1] * L,
-                        gt[pedal]['values']))
+        for col, pedal in enumerate(['sustain', 'sostenuto', 'soft'], 1):
+            cc = np.full((len(gt[pedal]['values']), 4), -1.0)
+            cc[:, 0] = gt[pedal]['times']
+            cc[:, col] = gt[pedal]['values']
+            cc_track_pedaling.append(cc)
+        cc_track_pedaling = np.concatenate(cc_track_pedaling)
         # sort cc according to time...
-        cc_track_pedaling.sort(key=lambda row: row[0])
-        cc_track_pedaling = np.array(cc_track_pedaling)
+        cc_track_pedaling = cc_track_pedaling[np.argsort(
+            cc_track_pedaling[:, 0], kind='stable')]
 
         if not frame_based:
             pedaling.append(cc_track_pedaling)
         else:
             # construct the frame-based output
-            # compute the number of frames
-            dur = dataset.get_score_duration(idx)
-            n_frames = int(utils.nframes(dur, hop, winlen)) + 1
-
             # set up initial matrix that will be output
             frame_track_pedaling = np.zeros((n_frames, 4), dtype=float)
             # doesn't work because shape suffers from precisions problems
@@ -558,41 +549,31 @@ def get_pedaling_mat(dataset, idx, frame_based=False, winlen=0.046, hop=0.01):
             frame_track_pedaling[:, 0] = np.arange(n_frames) * hop + winlen / 2
 
             # fill the matrix
-            # rember the last value used for each column index:
-            last_values = {
-                1: {
-                    "time": 0,
-                    "value": 0
-                },
-                2: {
-                    "time": 0,
-                    "value": 0
-                },
-                3: {
-                    "time": 0,
-                    "value": 0
-                },
-            }
-            # parse the control changes
-            for cc in cc_track_pedaling:
-                # compute the frame relative to this cc
-                frame_idx = utils.time2frame(cc[0], hop, winlen)
-                # put all values from last cc to this one equal to the last
-                # value
-                type_of_cc = np.argmax(cc[1:]) + 1
-                frame_track_pedaling[
-                    last_values[type_of_cc]["time"]:frame_idx,
-                    type_of_cc] = last_values[type_of_cc]["value"]
-                # update the last value
-                last_values[type_of_cc]["time"] = frame_idx
-                last_values[type_of_cc]["value"] = cc[type_of_cc]
-
-            # put all values from last cc to the end equal to the last
-            # value
-            if len(cc_track_pedaling) > 0:
-                for type_of_cc in range(1, 4):
-                    frame_track_pedaling[
-                        last_values[type_of_cc]["time"]:,
-                        type_of_cc] = last_values[type_of_cc]["value"]
-            pedaling.append(np.array(frame_track_pedaling))
+            _fill_pedal_frames(cc_track_pedaling, frame_track_pedaling, hop,
+                               winlen)
+            pedaling.append(frame_track_pedaling)
     return pedaling
+
+
+def _fill_pedal_frames(cc_track_pedaling, frame_track_pedaling, hop, winlen):
+    """
+    Fill columns 1-3 of `frame_track_pedaling` (in-place) with the
+    piecewise-constant pedaling values described by the control changes in
+    `cc_track_pedaling` (sorted by time, same format as returned by
+    `get_pedaling_mat` with `frame_based=False`). Frames before the first
+    control change of a certain type are left to their value.
+    """
+    if len(cc_track_pedaling) == 0:
+        return
+
+    # compute the frame relative to each cc
+    frames_idx = utils.time2frame(cc_track_pedaling[:, 0], hop, winlen)
+    types_of_cc = np.argmax(cc_track_pedaling[:, 1:], axis=1) + 1
+    frames = np.arange(frame_track_pedaling.shape[0])
+    for type_of_cc in range(1, 4):
+        mask = types_of_cc == type_of_cc
+        values = cc_track_pedaling[mask, type_of_cc]
+        # each frame takes the value of the last cc before it
+        last_cc = np.searchsorted(frames_idx[mask], frames, side='right') - 1
+        valid = last_cc >= 0
+        frame_track_pedaling[valid, type_of_cc] = values[last_cc[valid]]
@@ -28,15 +28,20 @@ def frame2time(frame: int, hop_size=3072, win_len=4096) -> float:
     return frame * hop_size + win_len / 2
 
 
-def time2frame(time, hop_size=3072, win_len=4096) -> int:
+def time2frame(time, hop_size=3072, win_len=4096) -> Union[int, np.ndarray]:
     """
     Takes a time position and outputs the best frame representing it.
     The input must use the same unity of measure for ``time``, ``hop_size``,
     and ``win_len`` (e.g. samples or seconds).  Indices start from 0.
 
-    Returns and int!
+    ``time`` can also be an array of time positions: in that case, all of them
+    are converted at once and an array of frame indices is returned.
+
+    Returns and int (or an array of ints)!
     """
-    return round((time - win_len / 2) / hop_size)
+    if np.ndim(time) == 0:
+        return round((time - win_len / 2) / hop_size)
+    return np.round((np.asarray(time) - win_len / 2) / hop_size).astype(int)
 
 
 def open_audio(audio_fn: Union[str, pathlib.Path]) -> Tuple[np.ndarray, int]:
@@ -105,13 +110,19 @@ def midipath2mat(path):
     """
     import pretty_midi as pm
 
-    out = []
-    for instrument in pm.PrettyMIDI(midi_file=path).instruments:
-        for note in instrument.notes:
-            out.append([note.pitch, note.start, note.end, note.velocity])
+    notes = [
+        note for instrument in pm.PrettyMIDI(midi_file=path).instruments
+        for note in instrument.notes
+    ]
+    n = len(notes)
+    out = np.column_stack([
+        np.fromiter((note.pitch for note in notes), dtype=float, count=n),
+        np.fromiter((note.start for note in notes), dtype=float, count=n),
+        np.fromiter((note.end for note in notes), dtype=float, count=n),
+        np.fromiter((note.velocity for note in notes), dtype=float, count=n)
+    ])
 
     # sort by onset, pitch and offset
-    out = np.array(out)
     ind = np.lexsort([out[:, 2], out[:, 0], out[:, 1]])
 
     return out[ind]
@@ -127,13 +138,11 @@ def mat_stretch(mat, target):
     in_times = mat[:, 1:3]
     out_times = target[:, 1:3]
 
-    # normalize in [0, 1]
-    in_times -= in_times.min()
-    in_times /= in_times.max()
-
-    # restretch
+    # normalize in [0, 1] and restretch with a single affine transform
+    in_min = in_times.min()
     new_start = out_times.min()
-    in_times *= (out_times.max() - new_start)
-    in_times += new_start
+    scale = (out_times.max() - new_start) / (in_times.max() - in_min)
+    in_times *= scale
+    in_times += new_start - in_min * scale
 
     return mat